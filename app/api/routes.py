@@ -1,12 +1,24 @@
-from fastapi import APIRouter
+from typing import List
+
+from fastapi import APIRouter, Body
 
 from app.models.schemas import SimulateRequest, SimulateResponse
 from app.services.simulate import simulate_from_reactflow
+from app.services.simulate_batch import simulate_many
 
 router = APIRouter()
 
+# Mỗi request trong batch là một lần giải trên pool; chặn batch quá lớn chiếm hết worker
+_MAX_BATCH_SIZE = 64
+
 
 @router.post("/api/v1/simulate", response_model=SimulateResponse)
 def simulate(req: SimulateRequest) -> SimulateResponse:
     return simulate_from_reactflow(req)
 
+
+@router.post("/api/v1/simulate/batch", response_model=List[SimulateResponse])
+def simulate_batch(
+    reqs: List[SimulateRequest] = Body(..., max_length=_MAX_BATCH_SIZE),
+) -> List[SimulateResponse]:
+    return simulate_many(reqs)
@@ -1,15 +1,50 @@
 from __future__ import annotations
 
-import math
+import copy
+import importlib.util
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandapower as pp  # type: ignore[import-not-found]
 
 from app.helper.elements.ac.registry import build_ac_registry
 from app.helper.elements.base import ElementContext
+from app.helper.net_export import _df_to_records
 from app.models.schemas import BusResult, CreationStatus, RunSettings, ValidationError
 
 
+# Thứ tự phụ thuộc: bus trước, nhánh trước switch (switch trỏ tới line/trafo)
+_BUILD_ORDER = (
+    "bus",
+    "ext_grid",
+    "line",
+    "transformer",
+    "trafo3w",
+    "load",
+    "gen",
+    "sgen",
+    "motor",
+    "storage",
+    "shunt",
+    "ward",
+    "switch",
+)
+_AC_NODE_TYPES = frozenset(_BUILD_ORDER)
+
+
+@lru_cache(maxsize=1)
+def _empty_net_template() -> pp.pandapowerNet:
+    # create_empty_network dựng lại ~mấy chục DataFrame + std_types mỗi lần (~100ms);
+    # deepcopy một bản mẫu rẻ hơn khoảng 10 lần. Bản mẫu chỉ được đọc, không sửa.
+    return pp.create_empty_network()
+
+
+# numba là tuỳ chọn: có cài thì runpp dùng (như mặc định của pandapower), không thì tắt
+# hẳn để pandapower khỏi log warning "numba cannot be imported" ở mỗi lần runpp
+_HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
 class ACNetworkBuilder:
     def __init__(
         self,
@@ -33,48 +68,36 @@ class ACNetworkBuilder:
         self._ctx: Optional[ElementContext] = None
 
     def has_ac_nodes(self) -> bool:
-        for t in ("bus", "line", "load", "ext_grid", "gen", "sgen", "transformer", "trafo3w", "switch", "motor", "shunt", "storage", "ward"):
-            if self.nodes_by_type.get(t):
-                return True
-        return False
+        # Duyệt các bucket thực có (thường ít) và tra frozenset, thay vì tra 13 type lần lượt
+        return any(nodes and t in _AC_NODE_TYPES for t, nodes in self.nodes_by_type.items())
 
     def build_and_validate(self, all_nodes: List[Dict[str, Any]]) -> bool:
         # Tạo net rỗng
-        self.net = pp.create_empty_network()
+        self.net = copy.deepcopy(_empty_net_template())
         self._ctx = ElementContext(net=self.net)
 
-        # Thứ tự phụ thuộc
-        order = [
-            "bus",
-            "ext_grid",
-            "line",
-            "transformer",
-            "trafo3w",
-            "load",
-            "gen",
-            "sgen",
-            "motor",
-            "storage",
-            "shunt",
-            "ward",
-            "switch",
-        ]
-
-        for t in order:
-            for node in self.nodes_by_type.get(t, []):
-                self._registry.validate_and_create(self._ctx, node)
+        for t in _BUILD_ORDER:
+            self._registry.validate_and_create_all(self._ctx, t, self.nodes_by_type.get(t, []))
 
         self.element_status = dict(self._ctx.element_status)
         self.errors = dict(self._ctx.errors)
 
-        # slack bus id: lấy bus đầu tiên nếu có
-        buses = self.nodes_by_type.get("bus") or []
-        if buses:
-            self.slack_bus_id = str(buses[0].get("id") or "")
+        self.slack_bus_id = self._find_slack_bus_id()
 
         # Nếu có bất kỳ lỗi nào => fail
         return len(self.errors) == 0
 
+    def _find_slack_bus_id(self) -> str:
+        # slack bus id: bus của ext_grid đầu tiên đang vận hành (đã tạo được), không có thì lấy bus đầu tiên
+        bus_by_id = self._ctx.bus_by_id if self._ctx is not None else {}
+        for node in self.nodes_by_type.get("ext_grid") or []:
+            data = node.get("data") or {}
+            bus_id = str(data.get("busId") or "").strip()
+            if bool(data.get("in_service", True)) and bus_id in bus_by_id:
+                return bus_id
+        buses = self.nodes_by_type.get("bus") or []
+        return str(buses[0].get("id") or "") if buses else ""
+
     def add_all_elements(self) -> None:
         # Elements đã được tạo trong build_and_validate
         return
@@ -82,24 +105,51 @@ class ACNetworkBuilder:
     def run_powerflow(self) -> None:
         if self.net is None:
             return
+        if not self._has_slack():
+            # Không bus nào nối với slack đang vận hành thì runpp chắc chắn lỗi => báo luôn,
+            # khỏi dựng ppc và chạy NR
+            self.converged = False
+            self.errors.setdefault("powerflow", []).append(
+                ValidationError.model_construct(
+                    element_id="",
+                    element_type="powerflow",
+                    message="Không có ext_grid (slack) đang vận hành, bỏ qua power flow.",
+                )
+            )
+            return
         try:
             pp.runpp(
                 self.net,
                 algorithm=self.settings.algorithm,
                 max_iteration=self.settings.max_iter,
                 tolerance_mva=self.settings.tolerance_mva,
+                init=self.settings.init,
+                # lightsim2grid để mặc định "auto" của pandapower (dùng nếu đã cài).
+                numba=_HAS_NUMBA,
             )
             self.converged = bool(getattr(self.net, "converged", False))
         except Exception as e:  # noqa: BLE001
             self.converged = False
             self.errors.setdefault("powerflow", []).append(
-                ValidationError(
+                ValidationError.model_construct(
                     element_id="",
                     element_type="powerflow",
                     message=f"Lỗi runpp: {e}",
                 )
             )
 
+    def _has_slack(self) -> bool:
+        """Có ít nhất một slack (ext_grid hoặc gen slack) đang vận hành, gắn vào bus đang vận hành."""
+        net = self.net
+        if net is None:
+            return False
+        live_buses = net.bus.index[net.bus["in_service"].to_numpy(dtype=bool)]
+        eg = net.ext_grid
+        if bool((eg["in_service"] & eg["bus"].isin(live_buses)).any()):
+            return True
+        gen = net.gen
+        return bool((gen["slack"] & gen["in_service"] & gen["bus"].isin(live_buses)).any())
+
     def check_violations(self) -> None:
         # Placeholder: có thể thêm check min/max vm_pu sau
         return
@@ -107,34 +157,37 @@ class ACNetworkBuilder:
     def collect_bus_results(self) -> Tuple[Dict[str, BusResult], List[Dict[str, Any]]]:
         if self.net is None or self._ctx is None:
             return {}, []
-        if not hasattr(self.net, "res_bus"):
+        res_bus = self.net.get("res_bus")
+        if res_bus is None:
             return {}, []
 
-        res_bus = self.net.res_bus
         bus_by_id: Dict[str, BusResult] = {}
 
-        # map theo ctx.bus_by_id
-        inv = {idx: node_id for node_id, idx in self._ctx.bus_by_id.items()}
-        for idx, row in res_bus.iterrows():
-            node_id = inv.get(int(idx))
-            if not node_id:
-                continue
-            # Clean NaN values: replace với 0.0 hoặc None
-            vm_pu_val = row.get("vm_pu", 0.0)
-            va_degree_val = row.get("va_degree", 0.0)
-            p_mw_val = row.get("p_mw", 0.0)
-            q_mvar_val = row.get("q_mvar", 0.0)
-            
-            bus_by_id[node_id] = BusResult(
-                vm_pu=_clean_float(vm_pu_val),
-                va_degree=_clean_float(va_degree_val),
-                p_mw=_clean_float(p_mw_val),
-                q_mvar=_clean_float(q_mvar_val),
+        # Lấy kết quả theo cột một lượt (numpy) thay vì iterrows từng bus
+        node_ids = list(self._ctx.bus_by_id)
+        pos = res_bus.index.get_indexer(list(self._ctx.bus_by_id.values()))
+        found = pos >= 0
+        pos = pos[found]
+        node_ids = [nid for nid, ok in zip(node_ids, found.tolist()) if ok]
+
+        cols = []
+        for c in ("vm_pu", "va_degree", "p_mw", "q_mvar"):
+            if c in res_bus.columns:
+                arr = res_bus[c].to_numpy(dtype=float, na_value=np.nan)[pos]
+                # Clean NaN/inf -> 0.0 theo cả cột
+                cols.append(np.where(np.isfinite(arr), arr, 0.0).tolist())
+            else:
+                cols.append([0.0] * len(node_ids))
+
+        # Giá trị đã là float sạch => bỏ qua validate của pydantic
+        for node_id, vm_pu, va_degree, p_mw, q_mvar in zip(node_ids, *cols):
+            bus_by_id[node_id] = BusResult.model_construct(
+                vm_pu=vm_pu, va_degree=va_degree, p_mw=p_mw, q_mvar=q_mvar
             )
 
         # cũng trả list raw cho frontend đang dùng res_bus
         # Clean NaN để JSON serialize được
-        res_bus_list = _clean_nan_records(res_bus.reset_index().replace({float("nan"): None}).to_dict(orient="records"))
+        res_bus_list = _df_to_records(res_bus)
         return bus_by_id, res_bus_list
 
     def collect_other_results(self) -> Dict[str, Dict[str, Any]]:
@@ -142,49 +195,11 @@ class ACNetworkBuilder:
             return {}
         out: Dict[str, Dict[str, Any]] = {}
         for tbl in ("res_line", "res_load", "res_gen", "res_sgen", "res_trafo", "res_trafo3w", "res_shunt", "res_storage", "res_motor"):
-            if hasattr(self.net, tbl):
+            df = self.net.get(tbl)
+            if df is not None:
                 try:
-                    df = getattr(self.net, tbl)
                     # Clean NaN để JSON serialize được
-                    records = _clean_nan_records(df.reset_index().replace({float("nan"): None}).to_dict(orient="records"))
-                    out[tbl] = records  # type: ignore[assignment]
+                    out[tbl] = _df_to_records(df)  # type: ignore[assignment]
                 except Exception:  # noqa: BLE001
                     pass
         return out
-
-
-def _clean_float(val: Any) -> float:
-    """Clean một giá trị float, replace NaN/inf với 0.0."""
-    if isinstance(val, float):
-        if math.isnan(val) or math.isinf(val):
-            return 0.0
-        return val
-    try:
-        fval = float(val)
-        if math.isnan(fval) or math.isinf(fval):
-            return 0.0
-        return fval
-    except (ValueError, TypeError):
-        return 0.0
-
-
-def _clean_nan_records(records: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
-    """
-    Clean NaN values trong list các dict records để JSON serialize được.
-    Replace NaN, inf, -inf với None (sẽ thành null trong JSON).
-    """
-    cleaned = []
-    for rec in records:
-        cleaned_rec: Dict[str, Any] = {}
-        for k, v in rec.items():
-            if isinstance(v, float):
-                if math.isnan(v) or math.isinf(v):
-                    cleaned_rec[k] = None
-                else:
-                    cleaned_rec[k] = v
-            else:
-                cleaned_rec[k] = v
-        cleaned.append(cleaned_rec)
-    return cleaned
-
-
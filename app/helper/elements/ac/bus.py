@@ -4,7 +4,7 @@ from typing import Any, Dict, Optional
 
 import pandapower as pp  # type: ignore[import-not-found]
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_float, _as_str
 
 
 class BusHandler:
@@ -21,7 +21,7 @@ class BusHandler:
     element_type = "bus"
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         vn_kv = data.get("vn_kv")
@@ -34,9 +34,8 @@ class BusHandler:
             )
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="missing vn_kv")
             return False
-        try:
-            vn = float(vn_kv)
-        except (TypeError, ValueError):
+        vn = _as_float(vn_kv)
+        if vn is None:
             ctx.add_error(
                 element_id=node_id,
                 element_type=self.element_type,
@@ -58,7 +57,7 @@ class BusHandler:
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         name = str(data.get("name") or "Bus")
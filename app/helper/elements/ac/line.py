@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandapower as pp
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_float, _as_str
 
 
 class LineHandler:
@@ -27,7 +27,7 @@ class LineHandler:
     element_type = "line"
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         from_bus_id = str(data.get("fromBusId") or "").strip()
@@ -91,9 +91,8 @@ class LineHandler:
             )
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="missing length_km")
             return False
-        try:
-            length_km = float(data.get("length_km"))
-        except (TypeError, ValueError):
+        length_km = _as_float(data.get("length_km"))
+        if length_km is None:
             ctx.add_error(
                 element_id=node_id, element_type=self.element_type, field="length_km", message="length_km phải là số."
             )
@@ -119,9 +118,7 @@ class LineHandler:
                 )
                 ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error=f"missing {f}")
                 return False
-            try:
-                float(data.get(f))
-            except (TypeError, ValueError):
+            if _as_float(data.get(f)) is None:
                 ctx.add_error(
                     element_id=node_id, element_type=self.element_type, field=f, message=f"{f} phải là số."
                 )
@@ -131,7 +128,7 @@ class LineHandler:
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         from_bus_id = str(data.get("fromBusId") or "").strip()
@@ -184,4 +181,51 @@ class LineHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error=str(e))
             return None
 
+    def create_many(self, ctx: ElementContext, nodes: List[NodeDict]) -> None:
+        """
+        Line theo std_type tạo từng cái; line theo tham số được gom lại thành mảng
+        from/to bus + thông số rồi tạo một lần bằng pp.create_lines_from_parameters.
+        """
+        param_nodes: List[NodeDict] = []
+        for node in nodes:
+            data: Dict[str, Any] = node.get("data") or {}
+            if str(data.get("std_type") or "").strip():
+                self.create(ctx, node)
+            else:
+                param_nodes.append(node)
+        if not param_nodes:
+            return
+
+        node_ids: List[str] = []
+        cols: Dict[str, List[Any]] = {
+            k: []
+            for k in (
+                "from_buses", "to_buses", "length_km", "r_ohm_per_km", "x_ohm_per_km",
+                "c_nf_per_km", "max_i_ka", "name", "in_service", "parallel", "df",
+            )
+        }
+        try:
+            bus_by_id = ctx.bus_by_id
+            for node in param_nodes:
+                data = node.get("data") or {}
+                node_ids.append(_as_str(node.get("id")))
+                cols["from_buses"].append(bus_by_id[str(data.get("fromBusId") or "").strip()])
+                cols["to_buses"].append(bus_by_id[str(data.get("toBusId") or "").strip()])
+                cols["length_km"].append(float(data.get("length_km")))
+                for f in ("r_ohm_per_km", "x_ohm_per_km", "c_nf_per_km", "max_i_ka"):
+                    cols[f].append(float(data.get(f)))
+                name_val = data.get("name")
+                cols["name"].append(str(name_val) if name_val is not None and str(name_val).strip() else None)
+                cols["in_service"].append(bool(data.get("in_service", True)))
+                cols["parallel"].append(int(data.get("parallel", 1)) if data.get("parallel") is not None else 1)
+                cols["df"].append(float(data.get("df", 1.0)) if data.get("df") is not None else 1.0)
+
+            idxs = pp.create_lines_from_parameters(ctx.net, **cols)
+        except Exception:  # noqa: BLE001
+            for node in param_nodes:
+                self.create(ctx, node)
+            return
 
+        for node_id, idx in zip(node_ids, idxs):
+            ctx.line_by_id[node_id] = int(idx)
+            ctx.set_status_ok(element_id=node_id, element_type=self.element_type)
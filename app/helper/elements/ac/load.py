@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandapower as pp  # type: ignore[import-not-found]
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_str, _check_numeric_fields
 
 
 class LoadHandler:
@@ -22,9 +22,10 @@ class LoadHandler:
     """
 
     element_type = "load"
+    numeric_fields = ("p_mw", "q_mvar", "scaling")
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
@@ -47,25 +48,13 @@ class LoadHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="missing p_mw")
             return False
 
-        for f in ("p_mw", "q_mvar", "scaling"):
-            if data.get(f) is None:
-                continue
-            try:
-                float(data.get(f))
-            except (TypeError, ValueError):
-                ctx.add_error(
-                    element_id=node_id,
-                    element_type=self.element_type,
-                    field=f,
-                    message=f"{f} phải là số.",
-                )
-                ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error=f"invalid {f}")
-                return False
+        if not _check_numeric_fields(ctx, node_id, self.element_type, data, self.numeric_fields):
+            return False
 
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
@@ -94,4 +83,46 @@ class LoadHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error=str(e))
             return None
 
+    def create_many(self, ctx: ElementContext, nodes: List[NodeDict]) -> None:
+        """
+        Tạo cả nhóm load (đã validate) bằng một lần pp.create_loads thay vì N lần create_load.
+
+        Nếu tạo hàng loạt lỗi thì quay về tạo từng node để có lỗi riêng cho từng element.
+        """
+        node_ids: List[str] = []
+        buses: List[int] = []
+        p_mw: List[float] = []
+        q_mvar: List[float] = []
+        scaling: List[float] = []
+        names: List[str] = []
+        in_service: List[bool] = []
+        controllable: List[bool] = []
+        try:
+            for node in nodes:
+                data: Dict[str, Any] = node.get("data") or {}
+                node_ids.append(_as_str(node.get("id")))
+                buses.append(ctx.bus_by_id[str(data.get("busId") or "").strip()])
+                p_mw.append(float(data.get("p_mw")))
+                q_mvar.append(float(data.get("q_mvar", 0.0)))
+                scaling.append(float(data.get("scaling", 1.0)))
+                names.append(str(data.get("name") or "Load"))
+                in_service.append(bool(data.get("in_service", True)))
+                controllable.append(bool(data.get("controllable", False)))
+
+            pp.create_loads(
+                ctx.net,
+                buses=buses,
+                p_mw=p_mw,
+                q_mvar=q_mvar,
+                scaling=scaling,
+                name=names,
+                in_service=in_service,
+                controllable=controllable,
+            )
+        except Exception:  # noqa: BLE001
+            for node in nodes:
+                self.create(ctx, node)
+            return
 
+        for node_id in node_ids:
+            ctx.set_status_ok(element_id=node_id, element_type=self.element_type)
@@ -4,7 +4,7 @@ from typing import Any, Dict, Optional
 
 import pandapower as pp  # type: ignore[import-not-found]
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_str, _check_numeric_fields
 
 
 class MotorHandler:
@@ -22,9 +22,10 @@ class MotorHandler:
     """
 
     element_type = "motor"
+    numeric_fields = ("pn_mech_mw", "cos_phi", "efficiency", "loading_percent")
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
@@ -42,20 +43,13 @@ class MotorHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="missing pn_mech_mw")
             return False
 
-        for f in ("pn_mech_mw", "cos_phi", "efficiency", "loading_percent"):
-            if data.get(f) is None:
-                continue
-            try:
-                float(data.get(f))
-            except (TypeError, ValueError):
-                ctx.add_error(element_id=node_id, element_type=self.element_type, field=f, message=f"{f} phải là số.")
-                ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error=f"invalid {f}")
-                return False
+        if not _check_numeric_fields(ctx, node_id, self.element_type, data, self.numeric_fields):
+            return False
 
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
@@ -4,7 +4,9 @@ from typing import Any, Dict, Optional
 
 import pandapower as pp  # type: ignore[import-not-found]
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_float, _as_str
+
+_SWITCH_ELEMENT_TYPES = frozenset(("bus", "line", "trafo"))
 
 
 class SwitchHandler:
@@ -25,7 +27,7 @@ class SwitchHandler:
     element_type = "switch"
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
@@ -49,6 +51,16 @@ class SwitchHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="missing elementId")
             return False
 
+        if element_type not in _SWITCH_ELEMENT_TYPES:
+            ctx.add_error(
+                element_id=node_id,
+                element_type=self.element_type,
+                field="elementType",
+                message=f"elementType '{element_type}' không hợp lệ (chỉ bus/line/trafo).",
+            )
+            ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="invalid elementType")
+            return False
+
         if element_type == "line":
             if element_id not in ctx.line_by_id:
                 ctx.add_error(
@@ -76,20 +88,9 @@ class SwitchHandler:
                 )
                 ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="bus not found")
                 return False
-        else:
-            ctx.add_error(
-                element_id=node_id,
-                element_type=self.element_type,
-                field="elementType",
-                message=f"elementType '{element_type}' không hợp lệ (chỉ bus/line/trafo).",
-            )
-            ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="invalid elementType")
-            return False
 
         if data.get("z_ohm") is not None:
-            try:
-                float(data.get("z_ohm"))
-            except (TypeError, ValueError):
+            if _as_float(data.get("z_ohm")) is None:
                 ctx.add_error(element_id=node_id, element_type=self.element_type, field="z_ohm", message="z_ohm phải là số.")
                 ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="invalid z_ohm")
                 return False
@@ -97,7 +98,7 @@ class SwitchHandler:
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         bus_id = str(data.get("busId") or "").strip()
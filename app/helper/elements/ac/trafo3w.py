@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandapower as pp  # type: ignore[import-not-found]
 
-from app.helper.elements.base import ElementContext, NodeDict
+from app.helper.elements.base import ElementContext, NodeDict, _as_str
+from app.models.schemas import ValidationError
 
 
 class Trafo3WHandler:
@@ -23,7 +24,7 @@ class Trafo3WHandler:
     element_type = "trafo3w"
 
     def validate(self, ctx: ElementContext, node: NodeDict) -> bool:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         hv_id = str(data.get("hvBusId") or "").strip()
@@ -47,11 +48,21 @@ class Trafo3WHandler:
             ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="duplicate bus ids")
             return False
 
-        for b in (hv_id, mv_id, lv_id):
-            if b not in ctx.bus_by_id:
-                ctx.add_error(element_id=node_id, element_type=self.element_type, message="Một hoặc nhiều busId không tồn tại.")
-                ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="bus not found")
-                return False
+        # Báo đủ mọi busId không tồn tại trong một lần (import lô lỗi thường sai nhiều field cùng lúc)
+        local_errs: List[ValidationError] = [
+            ValidationError.model_construct(
+                element_id=node_id,
+                element_type=self.element_type,
+                field=f,
+                message=f"{f} '{b}' không tồn tại.",
+            )
+            for f, b in (("hvBusId", hv_id), ("mvBusId", mv_id), ("lvBusId", lv_id))
+            if b not in ctx.bus_by_id
+        ]
+        if local_errs:
+            ctx.add_errors(self.element_type, local_errs)
+            ctx.set_status_fail(element_id=node_id, element_type=self.element_type, error="bus not found")
+            return False
 
         std_type = str(data.get("std_type") or "").strip()
         if not std_type:
@@ -62,7 +73,7 @@ class Trafo3WHandler:
         return True
 
     def create(self, ctx: ElementContext, node: NodeDict) -> Optional[int]:
-        node_id = str(node.get("id") or "")
+        node_id = _as_str(node.get("id"))
         data: Dict[str, Any] = node.get("data") or {}
 
         hv_id = str(data.get("hvBusId") or "").strip()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 
 import pandapower as pp  # type: ignore[import-not-found]
 
@@ -11,6 +11,23 @@ from app.models.schemas import CreationStatus, ValidationError
 NodeDict = Dict[str, Any]
 
 
+def _as_float(v: Any, _float=float) -> Optional[float]:
+    """Parse số; trả None nếu không parse được (`_float` bind sẵn để tránh lookup global)."""
+    if type(v) is _float:
+        return v
+    try:
+        return _float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_str(v: Any, _str=str) -> str:
+    """Chuẩn hoá giá trị về str; None -> ""."""
+    if v is None:
+        return ""
+    return v if type(v) is str else _str(v)
+
+
 @dataclass
 class ElementContext:
     """
@@ -41,8 +58,9 @@ class ElementContext:
         bucket: Optional[str] = None,
     ) -> None:
         key = bucket or element_type
+        # model_construct: dữ liệu lỗi do backend tự sinh, bỏ qua bước validate của pydantic
         self.errors.setdefault(key, []).append(
-            ValidationError(
+            ValidationError.model_construct(
                 element_id=element_id,
                 element_type=element_type,
                 element_name=element_name,
@@ -51,17 +69,40 @@ class ElementContext:
             )
         )
 
+    def add_errors(self, bucket: str, errors: List[ValidationError]) -> None:
+        """Gom một lô lỗi của cùng một node vào bucket bằng một lần extend."""
+        if errors:
+            self.errors.setdefault(bucket, []).extend(errors)
+
+    # Status được gọi cho mọi element nên cũng dùng model_construct (id/type luôn là str)
     def set_status_ok(self, *, element_id: str, element_type: str) -> None:
-        self.element_status[element_id] = CreationStatus(
+        self.element_status[element_id] = CreationStatus.model_construct(
             element_id=element_id, element_type=element_type, success=True
         )
 
     def set_status_fail(self, *, element_id: str, element_type: str, error: str) -> None:
-        self.element_status[element_id] = CreationStatus(
+        self.element_status[element_id] = CreationStatus.model_construct(
             element_id=element_id, element_type=element_type, success=False, error=error
         )
 
 
+def _check_numeric_fields(
+    ctx: ElementContext,
+    node_id: str,
+    element_type: str,
+    data: Dict[str, Any],
+    fields: Tuple[str, ...],
+) -> bool:
+    """Các field số optional (theo spec `numeric_fields` của handler): có giá trị thì phải parse được."""
+    for f in fields:
+        v = data.get(f)
+        if v is not None and _as_float(v) is None:
+            ctx.add_error(element_id=node_id, element_type=element_type, field=f, message=f"{f} phải là số.")
+            ctx.set_status_fail(element_id=node_id, element_type=element_type, error=f"invalid {f}")
+            return False
+    return True
+
+
 class ElementHandler(Protocol):
     element_type: str
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from .base import ElementContext, ElementHandler, NodeDict
 
@@ -28,4 +28,19 @@ class ElementsRegistry:
 
         return handler.create(ctx, node)
 
-
+    def validate_and_create_all(self, ctx: ElementContext, element_type: str, nodes: List[NodeDict]) -> None:
+        # Nodes đã được gom theo type: resolve handler một lần cho cả nhóm
+        # thay vì đọc lại node["type"] và lookup handler cho từng node.
+        handler = self.get(element_type)
+        if handler is None:
+            return
+        create_many = getattr(handler, "create_many", None)
+        if create_many is not None:
+            # Handler hỗ trợ tạo hàng loạt: validate hết rồi tạo một lần
+            valid = [node for node in nodes if handler.validate(ctx, node)]
+            if valid:
+                create_many(ctx, valid)
+            return
+        for node in nodes:
+            if handler.validate(ctx, node):
+                handler.create(ctx, node)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-import math
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+
+# Các bảng element/kết quả được export (đếm ở "summary", trả records ở "tables")
+_ELEMENT_TABLES = ("bus", "line", "load", "ext_grid", "gen", "sgen", "trafo", "trafo3w", "switch", "shunt", "motor", "storage")
+_RESULT_TABLES = ("res_bus", "res_line", "res_load", "res_gen", "res_sgen", "res_trafo", "res_trafo3w")
 
 
 def export_network(net: Any, mode: Literal["none", "summary", "tables"] = "none") -> Optional[Dict[str, Any]]:
     """
     Export pandapower network theo mức độ.
+    (pandapowerNet là dict nên đọc bảng bằng net.get thay vì hasattr + getattr.)
     - none: không trả
     - summary: meta + counts
     - tables: thêm element tables + results (nếu có)
@@ -16,23 +22,11 @@ def export_network(net: Any, mode: Literal["none", "summary", "tables"] = "none"
 
     payload: Dict[str, Any] = {"meta": {"counts": {}}}
     # Đếm sơ bộ các bảng phổ biến nếu tồn tại
-    for tbl in (
-        "bus",
-        "line",
-        "load",
-        "ext_grid",
-        "gen",
-        "sgen",
-        "trafo",
-        "trafo3w",
-        "switch",
-        "shunt",
-        "motor",
-        "storage",
-    ):
-        if hasattr(net, tbl):
+    for tbl in _ELEMENT_TABLES:
+        df = net.get(tbl)
+        if df is not None:
             try:
-                payload["meta"]["counts"][tbl] = int(len(getattr(net, tbl)))
+                payload["meta"]["counts"][tbl] = int(len(df))
             except Exception:  # noqa: BLE001
                 pass
 
@@ -43,37 +37,20 @@ def export_network(net: Any, mode: Literal["none", "summary", "tables"] = "none"
     # Trả về dạng list các bản ghi (records) để frontend dễ render bảng
     tables: Dict[str, Any] = {}
     results: Dict[str, Any] = {}
-    for tbl in (
-        "bus",
-        "line",
-        "load",
-        "ext_grid",
-        "gen",
-        "sgen",
-        "trafo",
-        "trafo3w",
-        "switch",
-        "shunt",
-        "motor",
-        "storage",
-    ):
-        if hasattr(net, tbl):
+    for tbl in _ELEMENT_TABLES:
+        df = net.get(tbl)
+        if df is not None:
             try:
-                df = getattr(net, tbl)
                 # Reset index để có cột index/id rõ ràng cho frontend
-                # Replace NaN với None để JSON serialize được (NaN không hợp lệ trong JSON)
-                records = df.reset_index().replace({float("nan"): None}).to_dict(orient="records")
-                tables[tbl] = _clean_nan_records(records)
+                tables[tbl] = _df_to_records(df)
             except Exception:  # noqa: BLE001
                 pass
 
-    for res_tbl in ("res_bus", "res_line", "res_load", "res_gen", "res_sgen", "res_trafo", "res_trafo3w"):
-        if hasattr(net, res_tbl):
+    for res_tbl in _RESULT_TABLES:
+        df = net.get(res_tbl)
+        if df is not None:
             try:
-                df = getattr(net, res_tbl)
-                # Replace NaN với None để JSON serialize được
-                records = df.reset_index().replace({float("nan"): None}).to_dict(orient="records")
-                results[res_tbl] = _clean_nan_records(records)
+                results[res_tbl] = _df_to_records(df)
             except Exception:  # noqa: BLE001
                 pass
 
@@ -82,23 +59,24 @@ def export_network(net: Any, mode: Literal["none", "summary", "tables"] = "none"
     return payload
 
 
-def _clean_nan_records(records: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+def _df_to_records(df: Any) -> List[Dict[str, Any]]:
     """
-    Clean NaN values trong list các dict records để JSON serialize được.
-    Replace NaN, inf, -inf với None (sẽ thành null trong JSON).
+    DataFrame -> list records (kèm cột index, như reset_index) để JSON serialize được.
+    NaN, inf, -inf -> None (null trong JSON); xử lý theo cột bằng numpy rồi dựng mỗi record đúng một lần.
     """
-    cleaned = []
-    for rec in records:
-        cleaned_rec: Dict[str, Any] = {}
-        for k, v in rec.items():
-            if isinstance(v, float):
-                if math.isnan(v) or math.isinf(v):
-                    cleaned_rec[k] = None
-                else:
-                    cleaned_rec[k] = v
-            else:
-                cleaned_rec[k] = v
-        cleaned.append(cleaned_rec)
-    return cleaned
-
-
+    names = [df.index.name or "index", *df.columns]
+    columns: List[List[Any]] = [df.index.tolist()]
+    for c in df.columns:
+        col = df[c]
+        kind = col.dtype.kind
+        if kind == "f":
+            arr = col.to_numpy()
+            finite = np.isfinite(arr)
+            # Trường hợp phổ biến (đã hội tụ, không NaN): lấy thẳng list float
+            columns.append(arr.tolist() if finite.all() else np.where(finite, arr, None).tolist())
+        elif col.hasnans:
+            # object / nullable (Int64, boolean...) có NaN/NA
+            columns.append(col.astype(object).where(col.notna(), None).tolist())
+        else:
+            columns.append(col.tolist())
+    return [dict(zip(names, row)) for row in zip(*columns)]
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import Any, Dict, List
 
 from app.models.schemas import SimulateRequest
 
 
+def _parse_nodes(request: SimulateRequest) -> List[Dict[str, Any]]:
+    # Dict nông (không model_dump): handler chỉ đọc node/data, không cần bản sao đệ quy của data
+    return [{"id": n.id, "type": n.type, "data": n.data} for n in request.nodes]
+
+
 def _parse_edges(request: SimulateRequest) -> List[Dict[str, Any]]:
-    return [e.model_dump() for e in request.edges]
+    return [{"id": e.id, "source": e.source, "target": e.target, "data": e.data} for e in request.edges]
 
 
 def _parse_nodes_by_type(nodes: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    nodes_by_type: Dict[str, List[Dict[str, Any]]] = {}
+    # Một lượt duyệt duy nhất: mọi consumer (AC/DC builder) đọc lại các bucket này
+    # thay vì tự lọc lại theo type.
+    nodes_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
     for n in nodes:
-        t = str(n.get("type") or "")
-        nodes_by_type.setdefault(t, []).append(n)
+        nodes_by_type[n.get("type") or ""].append(n)
     return nodes_by_type
 
 
@@ -60,6 +60,8 @@ class RunSettings(BaseModel):
     algorithm: str = "nr"
     max_iter: int = 20
     tolerance_mva: float = 1e-6
+    # Khởi tạo NR của runpp; "dc" giúp lưới mạch vòng hội tụ nhanh hơn. Net dựng mới mỗi request nên không có "results".
+    init: Literal["auto", "flat", "dc"] = "auto"
     return_network: Literal["none", "summary", "tables"] = "none"
 
 
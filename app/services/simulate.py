@@ -5,7 +5,7 @@ from typing import Any, Dict, List
 
 from app.helper.builders import ACNetworkBuilder, DCNetworkBuilder
 from app.helper.net_export import export_network
-from app.helper.simulate_utils import _parse_edges, _parse_nodes_by_type
+from app.helper.simulate_utils import _parse_edges, _parse_nodes, _parse_nodes_by_type
 from app.models.schemas import (
     BusResult,
     CreationStatus,
@@ -27,9 +27,9 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
     4. Chạy power flow
     5. Gom kết quả và trả về SimulateResponse
     """
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
 
-    nodes_dict = [node.model_dump() for node in request.nodes]
+    nodes_dict = _parse_nodes(request)
     edges_dict = _parse_edges(request)
     nodes_by_type = _parse_nodes_by_type(nodes_dict)
 
@@ -48,7 +48,7 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
                 errors.update(ac_builder.errors)
                 warnings.extend(ac_builder.warnings)
                 return _build_error_response(
-                    start_time, errors, element_status, warnings, ac_builder.slack_bus_id
+                    start_ns, errors, element_status, warnings, ac_builder.slack_bus_id
                 )
 
             ac_builder.add_all_elements()
@@ -64,18 +64,10 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
 
         dc_builder = DCNetworkBuilder(nodes_by_type, request.settings)
         if dc_builder.has_dc_nodes():
-            ok = dc_builder.build_network()
-            # Always merge errors/status even if creation failed, to avoid silent failures.
-            element_status.update(dc_builder.element_status)
-            errors.update(dc_builder.errors)
-
-            if ok:
+            if dc_builder.build_network():
                 dc_builder.add_all_elements()
                 dc_builder.run_powerflow()
 
-                element_status.update(dc_builder.element_status)
-                errors.update(dc_builder.errors)
-
                 if not ac_builder.has_ac_nodes():
                     converged = dc_builder.converged
                 elif ac_builder.converged and dc_builder.converged:
@@ -83,7 +75,12 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
                 else:
                     converged = False
 
-        runtime_ms = int((time.time() - start_time) * 1000)
+            # Always merge errors/status even if creation failed, to avoid silent failures.
+            # Builder ghi dồn vào cùng các dict nên chỉ cần gộp một lần sau mọi bước.
+            element_status.update(dc_builder.element_status)
+            errors.update(dc_builder.errors)
+
+        runtime_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
         bus_by_id: Dict[str, BusResult] = {}
         res_bus: List[Dict[str, Any]] = []
@@ -129,7 +126,8 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
             meta["converged"] = converged
 
         return SimulateResponse(
-            summary=Summary(
+            # Summary do service tự tính (kiểu đã đúng) nên bỏ qua validate
+            summary=Summary.model_construct(
                 converged=converged,
                 runtime_ms=runtime_ms,
                 slack_bus_id=slack_bus_id,
@@ -145,27 +143,63 @@ def simulate_from_reactflow(request: SimulateRequest) -> SimulateResponse:
 
     except Exception as e:  # noqa: BLE001
         errors.setdefault("network", []).append(
-            ValidationError(
+            ValidationError.model_construct(
                 element_id="",
                 element_type="network",
                 field="",
                 message=f"Lỗi khi tạo network: {str(e)}",
             )
         )
-        return _build_error_response(start_time, errors, element_status, warnings, slack_bus_id)
+        return _build_error_response(start_ns, errors, element_status, warnings, slack_bus_id)
+
+
+def warmup() -> None:
+    """
+    Chạy thử một lưới 2 bus để nạp sẵn pandapower, net mẫu và các code path của runpp
+    trước khi có request thật (gọi từ lifespan của app và khi worker của pool khởi động).
+    runpp ở đây dùng cùng cờ numba với request thật (bật khi đã cài numba, không phụ thuộc
+    số bus), nên các kernel Newton-Raphson của numba được compile ngay trong lần chạy này.
+    Không bao giờ raise.
+    """
+    try:
+        simulate_from_reactflow(
+            SimulateRequest(
+                nodes=[
+                    {"id": "b1", "type": "bus", "data": {"vn_kv": 20.0}},
+                    {"id": "b2", "type": "bus", "data": {"vn_kv": 20.0}},
+                    {"id": "eg", "type": "ext_grid", "data": {"busId": "b1"}},
+                    {
+                        "id": "l1",
+                        "type": "line",
+                        "data": {
+                            "fromBusId": "b1",
+                            "toBusId": "b2",
+                            "length_km": 1.0,
+                            "r_ohm_per_km": 0.1,
+                            "x_ohm_per_km": 0.1,
+                            "c_nf_per_km": 10.0,
+                            "max_i_ka": 0.4,
+                        },
+                    },
+                    {"id": "ld", "type": "load", "data": {"busId": "b2", "p_mw": 1.0}},
+                ]
+            )
+        )
+    except Exception:  # noqa: BLE001
+        pass
 
 
 def _build_error_response(
-    start_time: float,
+    start_ns: int,
     errors: Dict[str, List[ValidationError]],
     element_status: Dict[str, CreationStatus],
     warnings: List[str],
     slack_bus_id: str,
 ) -> SimulateResponse:
     """Helper function để build error response."""
-    runtime_ms = int((time.time() - start_time) * 1000)
+    runtime_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
     return SimulateResponse(
-        summary=Summary(converged=False, runtime_ms=runtime_ms, slack_bus_id=slack_bus_id),
+        summary=Summary.model_construct(converged=False, runtime_ms=runtime_ms, slack_bus_id=slack_bus_id),
         bus_by_id={},
         res_bus=[],
         warnings=warnings,
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.models.schemas import SimulateRequest, SimulateResponse
+
+# Module này cố ý không import pandapower/numpy ở top-level: worker (spawn) phải đặt
+# số luồng BLAS trước khi numpy được load, nếu không biến môi trường không còn tác dụng.
+_BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _max_workers() -> int:
+    workers_raw = os.getenv("SIMULATE_WORKERS", "")
+    try:
+        return max(1, int(workers_raw))
+    except ValueError:
+        pass
+    # Mặc định chia đều core cho các uvicorn worker (WEB_CONCURRENCY), mỗi worker có pool riêng
+    try:
+        web_workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        web_workers = 1
+    return max(1, (os.cpu_count() or 1) // web_workers)
+
+
+def _init_worker() -> None:
+    # Mỗi worker chỉ dùng 1 luồng BLAS để N process không tranh nhau core
+    for var in _BLAS_THREAD_VARS:
+        os.environ[var] = "1"
+
+    # Làm nóng ngay khi worker khởi động (sau khi đặt biến BLAS) để request đầu
+    # được giao cho worker mới không phải chịu import pandapower + lần runpp đầu
+    # (kể cả compile JIT của numba nếu đã cài: mỗi process spawn phải compile lại)
+    from app.services.simulate import warmup
+
+    warmup()
+
+
+def _simulate_one(request: SimulateRequest) -> SimulateResponse:
+    from app.services.simulate import simulate_from_reactflow
+
+    return simulate_from_reactflow(request)
+
+
+def _ping() -> None:
+    return None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Pool dùng chung cho cả process; chỉ tạo ở lần simulate_many đầu tiên (import pandapower
+    trong worker khá tốn, app không gọi batch thì không spawn process nào).
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=_max_workers(),
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _pool
+
+
+def start_pool() -> None:
+    """
+    Tạo pool và chờ mọi worker khởi động xong (đã chạy warmup) trước khi nhận traffic.
+    Chỉ gọi khi bật SIMULATE_PREWARM_POOL; mặc định pool tạo lười trong simulate_many.
+
+    Pool spawn worker theo nhu cầu: mỗi task gửi vào khi chưa có worker rảnh sẽ mở thêm
+    một worker, nên gửi đủ max_workers task rỗng là dựng đủ cả pool.
+    """
+    pool = _get_pool()
+    wait([pool.submit(_ping) for _ in range(_max_workers())])
+
+
+def shutdown_pool() -> None:
+    """Tắt pool (nếu có); lần dùng sau sẽ tạo pool mới."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def simulate_many(requests: List[SimulateRequest]) -> List[SimulateResponse]:
+    """
+    Chạy nhiều SimulateRequest độc lập song song trên process pool (mỗi request một task).
+
+    Kết quả giữ đúng thứ tự của `requests`. Mọi batch (kể cả 1 request) đều chạy trên pool.
+    Worker chết giữa chừng (OOM, crash trong C extension) làm hỏng cả pool: bỏ pool đó
+    để request sau dùng pool mới, còn batch hiện tại vẫn báo lỗi.
+    """
+    if not requests:
+        return []
+    try:
+        return list(_get_pool().map(_simulate_one, requests))
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
@@ -1,17 +1,48 @@
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router as api_router
+from app.services.simulate import warmup
+from app.services.simulate_batch import shutdown_pool, start_pool
 
-app = FastAPI(title="DND SaaS Backend")
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Làm nóng solver trước khi nhận traffic để request đầu không chịu cold-start.
+    # Pool của /simulate/batch tạo lười ở lần gọi đầu, trừ khi bật SIMULATE_PREWARM_POOL.
+    warmup()
+    if _get_prewarm_pool():
+        start_pool()
+    try:
+        yield
+    finally:
+        shutdown_pool()
+
+
+def _get_prewarm_pool() -> bool:
+    # SIMULATE_PREWARM_POOL=1: spawn + warmup đủ worker của pool batch ngay lúc khởi động
+    return os.getenv("SIMULATE_PREWARM_POOL", "").strip().lower() in ("1", "true", "yes")
+
+
+def _get_cors_origins() -> List[str]:
+    # CORS_ORIGINS="https://a.com,https://b.com"; không đặt thì giữ "*" như trước
+    origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
+    return origins or ["*"]
+
+
+app = FastAPI(title="DND SaaS Backend", lifespan=lifespan)
+
+_cors_origins = _get_cors_origins()
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=_cors_origins,
+    # Origin "*" không đi kèm credentials; muốn gửi cookie/auth thì đặt CORS_ORIGINS cụ thể
+    allow_credentials=_cors_origins != ["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -36,5 +67,15 @@ def _get_host() -> str:
     return os.getenv("HOST", "0.0.0.0")
 
 
+def _get_workers() -> int:
+    # Mặc định 1; /simulate chạy ngay trong process của uvicorn nên tăng lên để dùng nhiều core
+    workers_raw = os.getenv("WEB_CONCURRENCY", "1")
+    try:
+        return max(1, int(workers_raw))
+    except ValueError:
+        return 1
+
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host=_get_host(), port=_get_port())
+    # loop/http để "auto": uvicorn[standard] dùng uvloop + httptools khi có, tự lùi về asyncio/h11
+    uvicorn.run("main:app", host=_get_host(), port=_get_port(), workers=_get_workers())
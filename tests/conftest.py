@@ -20,8 +20,9 @@ def element_context(net: pp.pandapowerNet) -> ElementContext:  # type: ignore[na
     return ElementContext(net=net)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def ac_registry():
+    # Handler không giữ state => dùng chung một registry cho cả test session
     return build_ac_registry()
 
 